@@ -1,4 +1,4 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 '''
  * Copyright (c) 2015 Zachary Rauen
  * Website: www.ZackRauen.com
@@ -18,43 +18,62 @@
  * See the License for the specific language governing permissions and
  * limitations under the License.
 '''
-import smbus
+import ctypes
+import errno
+import fcntl
+import functools
+import operator
+import os
+import re
+from smbus2 import SMBus, i2c_msg
 
-class I2CException(Exception):
+_BUS_CACHE = {}
+_VERBOSE_CLASSES = {}
+
+# From linux/i2c.h and linux/i2c-dev.h
+I2C_M_RD = 0x0001
+I2C_SLAVE = 0x0703
+I2C_RDWR_MAX_MSGS = 42
+
+class I2CException(ValueError):
+    """Raised when an I2C operation is given an out of range argument"""
     
     def __init__(self,operation,reason):
-        super(I2CException, self).__init__("Error with operation: "+operation,"Reason: "+reason)
+        super(I2CException, self).__init__(operation,reason)
+        self.operation = operation
+        self.reason = reason
     
     def __str__(self):
-        return " ".join(self.args)
+        return "Error with operation: "+self.operation+" Reason: "+self.reason
     
     def __repr__(self):
-        return " ".join(self.args)
+        return str(self)
 
 class BaseUtils(object):
     """Low level methods mainly used for Raspberry Pi"""
     
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def getRevision():
         """Uses the /proc/cpuinfo file to find the pi revision"""
         try:
-            with open('/proc/cpuinfo','r') as infile:
-                for line in infile:
-                    if line.startswith('Revision'):
-                        return 1 if line.rstrip()[-1] in ['0','2','3'] else 2
-                    else:
-                        return 0
-        except:
+            with open('/proc/cpuinfo','rb') as infile:
+                match = re.search(rb'^Revision\s*:\s*([0-9a-fA-F]+)', infile.read(), re.M)
+            if not match:
+                return 0
+            # Only the original Model B boards (0002/0003, optionally with the
+            # overvolt bit set) are revision 1
+            return 1 if int(match.group(1), 16) & 0xFFFFFF in (2, 3) else 2
+        except (IOError, ValueError):
             return 0
     
     @staticmethod
     def cleanBinaryData(data,length):
-        try:
-            data=bin(data)[2:]
-        except TypeError:
-            if data.find("0b")>=0:
-                data=data[2:]
-        return "0"*(length-len(data))+data
+        if not isinstance(data,str):
+            return bin(operator.index(data))[2:].zfill(length)
+        if data.startswith("0b"):
+            data=data[2:]
+        return data.zfill(length)
     
     @staticmethod
     def blankBinaryString(length,default='0'):
@@ -66,13 +85,11 @@ class BaseUtils(object):
     
     @staticmethod
     def buildBinaryString(places,length,default='0'):
-        blank = BaseUtils.blankBinaryList(length,default)
-        for i in places: 
-            if default=='0':
-                blank[i]='1'
-            else:
-                blank[i]='0'
-        return ''.join(blank)
+        buf = bytearray(default*length, 'ascii')
+        flip = ord('1') if default=='0' else ord('0')
+        for i in places:
+            buf[i] = flip
+        return buf.decode('ascii')
 
 
 class I2C(object):
@@ -85,25 +102,28 @@ class I2C(object):
     @staticmethod
     def probe(address, bus=False):
         """Probes a given address"""
+        if address & ~0xFF:
+            raise I2CException("initialization","address is out of range (0-255)")
         try:
-            bus = smbus.SMBus(bus if bus else I2C.getI2CBus())
-            if address>=0 and address<=255:
-                bus.write_quick(address)
-            else:
-                raise I2CException("initialization","address is out of range (0-255)")
+            I2C.getSharedBus(bus).write_quick(address)
             return True
         except IOError:
             return False
-        except I2CException as e:
-            print(e)
-            return False
+    
+    @staticmethod
+    def getSharedBus(bus=False):
+        """Gets an SMBus handle for the given bus, opened once and reused"""
+        busnum = bus if bus else I2C.getI2CBus()
+        if busnum not in _BUS_CACHE:
+            _BUS_CACHE[busnum] = SMBus(busnum)
+        return _BUS_CACHE[busnum]
     
     @staticmethod
     def getI2CBus():
         """Gets the default I2C bus number based on revision"""
         return 1 if BaseUtils.getRevision() > 1 else 0
         
-    def __init__(self, address, bus=False, verbose=False):
+    def __init__(self, address, bus=False, verbose=False, retainsRegister=False):
         """
         Initializes the I2C class, a wrapper for the SMBus library
         
@@ -111,17 +131,76 @@ class I2C(object):
         @param address: address for I2C device
         @param bus: which I2C bus to access on the RPi
         @param verbose: allows all operations to output current actions.
+        @param retainsRegister: set if the device keeps its register pointer between
+                                reads, letting repeated readByte calls skip the register write
         """
+        if address & ~0xFF:
+            raise I2CException("initialization","address is out of range (0-255)")
+        self.address = address
+        self.busnum = bus if bus else I2C.getI2CBus()
+        self.bus = SMBus(self.busnum)
+        # Bind smbus2's descriptor to this device once so plain byte reads/writes
+        # can use read()/write() on it; if the kernel refuses (claimed or 10-bit
+        # address), those fall back to smbus2 and fail per operation as before
         try:
-            if address>=0 and address<=255:
-                self.address = address
-            else:
-                raise I2CException("initialization","address is out of range (0-255)")
-            self.bus = smbus.SMBus(bus if bus else I2C.getI2CBus())
-            self.verbose = verbose
-        except I2CException as e:
-            self.printError()
-            print(e)
+            fcntl.ioctl(self.bus.fd, I2C_SLAVE, address)
+            self._fd = self.bus.fd
+        except IOError:
+            self._fd = None
+        self.verbose = verbose
+        self.retainsRegister = retainsRegister
+        self._lastRegister = None
+        self._rxbuf = bytearray(32)
+        
+    @property
+    def verbose(self):
+        """Whether every operation is reported as it happens"""
+        return isinstance(self, VerboseMixin)
+    
+    @verbose.setter
+    def verbose(self, verbose):
+        # Verbosity is the instance's class: a cached Verbose<Class> subclass
+        # mixing in VerboseMixin, or the plain class it was made from
+        cls = type(self)
+        if verbose and not isinstance(self, VerboseMixin):
+            if cls not in _VERBOSE_CLASSES:
+                _VERBOSE_CLASSES[cls] = type("Verbose"+cls.__name__, (VerboseMixin, cls), {"_plainClass": cls})
+            self.__class__ = _VERBOSE_CLASSES[cls]
+        elif not verbose and "_plainClass" in cls.__dict__:
+            self.__class__ = cls._plainClass
+        
+    def readMsg(self, n):
+        """Builds an i2c_msg that reads n bytes from this device, for use with transaction"""
+        return i2c_msg.read(self.address, n)
+        
+    def writeMsg(self, data):
+        """Builds an i2c_msg that writes the given bytes to this device, for use with transaction"""
+        return i2c_msg.write(self.address, data)
+        
+    def transaction(self, *msgs):
+        """
+        Performs the given i2c_msg segments as one combined transfer (one I2C_RDWR ioctl)
+        
+        @keyword arguments:
+        @param msgs: messages built by readMsg/writeMsg; read data is left in each read message
+        """
+        self._lastRegister = None
+        self.bus.i2c_rdwr(*msgs)
+        
+    def rdwr(self, *segments):
+        """
+        Performs one combined transfer, reading into and writing from caller-owned buffers
+        
+        @keyword arguments:
+        @param segments: (flags, buffer, length) tuples, one per message; each
+                         buffer must be a writable bytes-like object such as a bytearray
+        """
+        msgs = list()
+        for flags, buf, length in segments:
+            cbuf = (ctypes.c_char * length).from_buffer(buf)
+            msgs.append(i2c_msg(addr=self.address, flags=flags, len=length,
+                                buf=ctypes.cast(cbuf, ctypes.POINTER(ctypes.c_char))))
+        self.transaction(*msgs)
         
     def printError(self):
         """Prints the default error message and returns false"""
@@ -136,16 +215,14 @@ class I2C(object):
         @param signed: optional parameter, flips between signed and unsigned input
         """
         try:
-            result = self.bus.read_byte(self.address)
+            if self._fd is None:
+                result = self.bus.read_byte(self.address)
+            else:
+                result = os.read(self._fd, 1)[0]
             if result > 127 and signed: result -= 256
-            if self.verbose:
-                print("I2C: The device with address 0x%02X returned value 0x%02X" % (self.address, result))
-                return result
+            return result
         except IOError:
             return self.printError()
-        except I2CException as e:
-            print(e)
-            return False;
         
     def readByte(self, register, signed=False):
         """
@@ -155,21 +232,19 @@ class I2C(object):
         @param register: register address or command for I2C device
         @param signed: optional parameter, flips between signed and unsigned input
         """
+        if register & ~0xFF:
+            raise I2CException("reading","register address/command is out of range (0-255)")
         try:
-            if register>=0 and register<=255:
-                result = self.bus.read_byte_data(self.address, register)
+            if register == self._lastRegister:
+                result = self.bus.read_byte(self.address)
             else:
-                raise I2CException("reading","register address/command is out of range (0-255)")
+                result = self.bus.read_byte_data(self.address, register)
+                if self.retainsRegister: self._lastRegister = register
             if result > 127 and signed: result -= 256
-            if self.verbose:
-                print("I2C: The device with address 0x%02X returned value 0x%02X from register/command 0x%02X"
-                      % (self.address, result, register))
-                return result
+            return result
         except IOError:
+            self._lastRegister = None
             return self.printError()
-        except I2CException as e:
-            print(e)
-            return False;
     
     def readWord(self, register, signed=False, bigEndian=False):
         """
@@ -180,47 +255,61 @@ class I2C(object):
         @param signed: optional parameter, flips between signed and unsigned input
         @param bigEndian: optional parameter, allows switch from little endian system
         """
+        if register & ~0xFF:
+            raise I2CException("reading","register address/command is out of range (0-255)")
         try:
-            if register>=0 and register<=255:
-                result = self.bus.read_word_data(self.address, register)
-            else:
-                raise I2CException("reading","register address/command is out of range (0-255)")
-            if bigEndian: result = ((result << 8) & 0xFF00) + (result >> 8)
-            if result > 32767 and signed: result -= 65536
-            if self.verbose:
-                print("I2C: The device with address 0x%02X returned value 0x%04X from register/command 0x%02X"
-                      % (self.address, result & 0xFFFF, register))
-                return result
+            self._lastRegister = None
+            word = self.bus.read_word_data(self.address, register)
+            return int.from_bytes(word.to_bytes(2, 'little'), 'big' if bigEndian else 'little', signed=signed)
         except IOError:
             return self.printError()
-        except I2CException as e:
-            print(e)
-            return False;
 
     def readListI2C(self, register, n):
         """
-        Reads a list of unsigned bytes of length n
+        Reads n unsigned bytes into a reused receive buffer and returns a
+        memoryview of them. The view is overwritten by the next readListI2C,
+        so copy it (bytes(view)) if it needs to outlive that call.
         
         @keyword arguments:
         @param register: register address or command for I2C device
         @param n: the number of bytes to accept
         """
+        if register & ~0xFF:
+            raise I2CException("reading","register address/command is out of range (0-255)")
         try:
-            if n>32: Warning("This exceeds the capabilities of SMBus devices")
-            if register>=0 and register<=255:
+            self._lastRegister = None
+            if n > len(self._rxbuf): self._rxbuf = bytearray(n)
+            self.rdwr((0, bytearray((register,)), 1), (I2C_M_RD, self._rxbuf, n))
+            return memoryview(self._rxbuf)[:n]
+        except IOError:
+            return self.printError()
+        
+    def readBlockOrEmulated(self, register, n):
+        """
+        Reads n unsigned bytes from consecutive registers in one block read,
+        falling back to word reads if the adapter lacks I2C block support
+        
+        @keyword arguments:
+        @param register: first register address for I2C device
+        @param n: the number of bytes to accept
+        """
+        if register & ~0xFF or (register+n-1) & ~0xFF:
+            raise I2CException("reading","register range is out of range (0-255)")
+        try:
+            self._lastRegister = None
+            try:
                 results = self.bus.read_i2c_block_data(self.address, register, n)
-            else:
-                raise I2CException("reading","register address/command is out of range (0-255)")
-            if self.verbose:
-                print("I2C: The device with address 0x%02X returned the values below from register/command 0x%02X"
-                      % (self.address, register))
-                print(results)
-                return results
+            except IOError as e:
+                if e.errno != errno.EOPNOTSUPP: raise
+                results = list()
+                for offset in range(0, n-1, 2):
+                    word = self.bus.read_word_data(self.address, register+offset)
+                    results += [word & 0xFF, word >> 8]
+                if n & 1:
+                    results.append(self.bus.read_byte_data(self.address, register+n-1))
+            return results
         except IOError:
             return self.printError()
-        except I2CException as e:
-            print(e)
-            return False;
         
     def readListSMBus(self, register, n):
         """
@@ -230,22 +319,14 @@ class I2C(object):
         @param register: register address or command for I2C device
         @param n: the number of bytes to accept
         """
+        if n>32: raise I2CException("reading","this exceeds the capabilities of SMBus devices (32 bytes)")
+        if register & ~0xFF:
+            raise I2CException("reading","register address/command is out of range (0-255)")
         try:
-            if n>32: raise Exception("This exceeds the capabilities of SMBus devices")
-            if register>=0 and register<=255:
-                results = self.bus.read_block_data(self.address, register, n)
-            else:
-                raise I2CException("reading","register address/command is out of range (0-255)")
-            if self.verbose:
-                print("I2C: The device with address 0x%02X returned the values below from register/command 0x%02X"
-                      % (self.address, register))
-                print(results)
-                return results
+            self._lastRegister = None
+            return self.bus.read_block_data(self.address, register)[:n]
         except IOError:
             return self.printError()
-        except I2CException as e:
-            print(e)
-            return False;
 
     def simpleWriteByte(self, value):
         """
@@ -255,18 +336,16 @@ class I2C(object):
         @param register: register address or command for I2C device
         @param value: the value (byte) to be written to the device
         """
+        if value & ~0xFF:
+            raise I2CException("writing","value to write is out of range (0-255)")
         try:
-            if value>=0 and value<=255:
+            self._lastRegister = None
+            if self._fd is None:
                 self.bus.write_byte(self.address, value)
             else:
-                raise I2CException("writing","value to write is out of range (0-255)")
-            if self.verbose:
-                print("I2C: Wrote value 0x%02X to device 0x%02X" % (value, self.address))
+                os.write(self._fd, bytes((value,)))
         except IOError:
             return self.printError()
-        except I2CException as e:
-            print(e)
-            return False;
 
     def writeByte(self, register, value):
         """
@@ -276,21 +355,13 @@ class I2C(object):
         @param register: register address or command for I2C device
         @param value: the value (byte) to be written to the device
         """
+        if (register | value) & ~0xFF:
+            raise I2CException("writing","register address/command or value is out of range (0-255)")
         try:
-            if register>=0 and register<=255:
-                if value>=0 and value<=255:
-                    self.bus.write_byte_data(self.address, register, value)
-                else:
-                    raise I2CException("writing","value to write is out of range (0-255)")
-            else:
-                raise I2CException("writing","register address/command is out of range (0-255)")
-            if self.verbose:
-                print("I2C: Wrote value 0x%02X to register/with command 0x%02X" % (value, register))
+            self._lastRegister = None
+            self.bus.write_byte_data(self.address, register, value)
         except IOError:
             return self.printError()
-        except I2CException as e:
-            print(e)
-            return False;
     
     def writeWord(self, register, value):
         """
@@ -300,22 +371,35 @@ class I2C(object):
         @param register: register address or command for I2C device
         @param value: the word (2 bytes) to be written to the device
         """
+        if register & ~0xFF or value & ~0xFFFF:
+            raise I2CException("writing","register address/command (0-255) or value (0-65535) is out of range")
         try:
-            if register>=0 and register<=255:
-                if value>=0 and value<=255:
-                    self.bus.write_word_data(self.address, register, value)
-                else:
-                    raise I2CException("writing","value to write is out of range (0-255)")
-            else:
-                raise I2CException("writing","register address/command is out of range (0-255)")
-            if self.verbose:
-                print("I2C: Wrote value 0x%04X to register pair 0x%02X,0x%02X or with command 0x%02X"
-                      % (value, register, register+1,register))
+            self._lastRegister = None
+            self.bus.write_word_data(self.address, register, value)
+        except IOError:
+            return self.printError()
+
+    def writeRegisters(self, register, values):
+        """
+        Writes values to consecutive registers starting at register in one
+        SMBus "I2C block write" transaction. This is limited to 32 bytes and
+        needs adapter support for I2C block writes; writeListI2C sends the same
+        register-then-data burst as a raw I2C_RDWR transfer with neither limit.
+
+        @keyword arguments:
+        @param register: first register address for I2C device
+        @param values: the bytes to be written to register, register+1, ...
+        """
+        if register & ~0xFF:
+            raise I2CException("writing","register address/command is out of range (0-255)")
+        values = bytearray(values)
+        if len(values)>32:
+            raise I2CException("writing","this exceeds the capabilities of SMBus devices (32 bytes)")
+        try:
+            self._lastRegister = None
+            self.bus.write_i2c_block_data(self.address, register, list(values))
         except IOError:
             return self.printError()
-        except I2CException as e:
-            print(e)
-            return False;
 
     def writeListI2C(self, register, data):
         """
@@ -323,22 +407,17 @@ class I2C(object):
         
         @keyword arguments:
         @param register: register address or command for I2C device
-        @param data: the list of bytes to be written out
+        @param data: the bytes to be written out, as a list, bytes or bytearray
         """
+        if register & ~0xFF:
+            raise I2CException("writing","register address/command is out of range (0-255)")
         try:
-            if self.debug:
-                print("I2C: Writing data to register/with command 0x%02X:" % register)
-                print(data)
-            if len(data)>32: Warning("This exceeds the capabilities of SMBus devices")
-            if register>=0 and register<=255:
-                self.bus.write_i2c_block_data(self.address, register, data)
-            else:
-                raise I2CException("reading","register address/command is out of range (0-255)")
+            self._lastRegister = None
+            payload = bytearray((register,))
+            payload += bytearray(data)
+            self.rdwr((0, payload, len(payload)))
         except IOError:
-            return self.errMsg()
-        except I2CException as e:
-            print(e)
-            return False;
+            return self.printError()
         
     def writeListSMBus(self, register, data):
         """
@@ -348,31 +427,153 @@ class I2C(object):
         @param register: register address or command for I2C device
         @param data: the list of bytes to be written out
         """
+        if len(data)>32: raise I2CException("writing","this exceeds the capabilities of SMBus devices (32 bytes)")
+        if register & ~0xFF:
+            raise I2CException("writing","register address/command is out of range (0-255)")
         try:
-            if self.debug:
-                print("I2C: Writing data to register/with command 0x%02X:" % register)
-                print(data)
-            if len(data)>32: raise Exception("This exceeds the capabilities of SMBus devices")
-            if register>=0 and register<=255:
-                self.bus.write_block_data(self.address, register, data)
-            else:
-                raise I2CException("reading","register address/command is out of range (0-255)")
+            self._lastRegister = None
+            self.bus.write_block_data(self.address, register, data)
         except IOError:
-            return self.errMsg()
-        except I2CException as e:
-            print(e)
-            return False;
+            return self.printError()
+
+    def repeatedTransmit(self, writeBytes, readLength, count):
+        """
+        Performs count write-then-read pairs using raw I2C_RDWR transfers,
+        e.g. to drain a FIFO. Up to 21 pairs are sent per ioctl.
+        
+        @keyword arguments:
+        @param writeBytes: the bytes written before each read, usually the FIFO register
+        @param readLength: the number of bytes to read after each write
+        @param count: the number of write/read pairs to perform
+        """
+        try:
+            tx = self.writeMsg(list(writeBytes))
+            reads = [self.readMsg(readLength) for _ in range(count)]
+            pairs = I2C_RDWR_MAX_MSGS // 2
+            for start in range(0, count, pairs):
+                msgs = list()
+                for rx in reads[start:start+pairs]:
+                    msgs += [tx, rx]
+                self.transaction(*msgs)
+            return [list(rx) for rx in reads]
+        except IOError:
+            return self.printError()
+
+
+class VerboseMixin(object):
+    """
+    Prints each I2C operation as it happens. Setting I2C.verbose mixes this into
+    the instance's class, so the plain I2C methods carry no output code.
+    """
+    
+    # Bound str.format methods, so each message template is only set up once
+    _fmtSimpleRead = "I2C: The device with address 0x{:02X} returned value 0x{:02X}".format
+    _fmtReadByte = "I2C: The device with address 0x{:02X} returned value 0x{:02X} from register/command 0x{:02X}".format
+    _fmtReadWord = "I2C: The device with address 0x{:02X} returned value 0x{:04X} from register/command 0x{:02X}".format
+    _fmtReadList = "I2C: The device with address 0x{:02X} returned the values below from register/command 0x{:02X}".format
+    _fmtReadRange = "I2C: The device with address 0x{:02X} returned the values below from registers 0x{:02X}-0x{:02X}".format
+    _fmtReadRepeated = "I2C: The device with address 0x{:02X} returned the values below from {:d} transfers".format
+    _fmtSimpleWrite = "I2C: Wrote value 0x{:02X} to device 0x{:02X}".format
+    _fmtWriteByte = "I2C: Wrote value 0x{:02X} to register/with command 0x{:02X}".format
+    _fmtWriteWord = "I2C: Wrote value 0x{:04X} to register pair 0x{:02X},0x{:02X} or with command 0x{:02X}".format
+    _fmtWriteRange = "I2C: Wrote {:d} values to registers 0x{:02X}-0x{:02X}".format
+    _fmtWriteList = "I2C: Writing data to register/with command 0x{:02X}:".format
+    
+    def simpleReadByte(self, signed=False):
+        result = super(VerboseMixin, self).simpleReadByte(signed)
+        if result is not False:
+            print(self._fmtSimpleRead(self.address, result & 0xFF))
+        return result
+    
+    def readByte(self, register, signed=False):
+        result = super(VerboseMixin, self).readByte(register, signed)
+        if result is not False:
+            print(self._fmtReadByte(self.address, result & 0xFF, register))
+        return result
+    
+    def readWord(self, register, signed=False, bigEndian=False):
+        result = super(VerboseMixin, self).readWord(register, signed, bigEndian)
+        if result is not False:
+            print(self._fmtReadWord(self.address, result & 0xFFFF, register))
+        return result
+    
+    def readListI2C(self, register, n):
+        results = super(VerboseMixin, self).readListI2C(register, n)
+        if results is not False:
+            print(self._fmtReadList(self.address, register))
+            print(list(results))
+        return results
+    
+    def readListSMBus(self, register, n):
+        results = super(VerboseMixin, self).readListSMBus(register, n)
+        if results is not False:
+            print(self._fmtReadList(self.address, register))
+            print(results)
+        return results
+    
+    def readBlockOrEmulated(self, register, n):
+        results = super(VerboseMixin, self).readBlockOrEmulated(register, n)
+        if results is not False:
+            print(self._fmtReadRange(self.address, register, register+n-1))
+            print(results)
+        return results
+    
+    def simpleWriteByte(self, value):
+        result = super(VerboseMixin, self).simpleWriteByte(value)
+        if result is None:
+            print(self._fmtSimpleWrite(value, self.address))
+        return result
+    
+    def writeByte(self, register, value):
+        result = super(VerboseMixin, self).writeByte(register, value)
+        if result is None:
+            print(self._fmtWriteByte(value, register))
+        return result
+    
+    def writeWord(self, register, value):
+        result = super(VerboseMixin, self).writeWord(register, value)
+        if result is None:
+            print(self._fmtWriteWord(value, register, register+1, register))
+        return result
+    
+    def writeRegisters(self, register, values):
+        values = list(values)
+        result = super(VerboseMixin, self).writeRegisters(register, values)
+        if result is None:
+            print(self._fmtWriteRange(len(values), register, register+len(values)-1))
+        return result
+    
+    def writeListI2C(self, register, data):
+        print(self._fmtWriteList(register))
+        print(data)
+        return super(VerboseMixin, self).writeListI2C(register, data)
+    
+    def writeListSMBus(self, register, data):
+        print(self._fmtWriteList(register))
+        print(data)
+        return super(VerboseMixin, self).writeListSMBus(register, data)
+    
+    def repeatedTransmit(self, writeBytes, readLength, count):
+        results = super(VerboseMixin, self).repeatedTransmit(writeBytes, readLength, count)
+        if results is not False:
+            print(self._fmtReadRepeated(self.address, count))
+            print(results)
+        return results
 
     
-def probeAll():
+def probeAll(bus=False):
+    """Probes every address on a bus, sharing one open bus handle, and returns the ones that answered"""
+    bus = I2C.getSharedBus(bus)
     i2cList = list()
     for i in range(0,256):
-        print("Probing 0x%02X"%i)
-        tester=I2C.probe(i)
-        if tester:
+        try:
+            bus.write_quick(i)
             i2cList.append(i)
-        print("Found a total of "+str(len(i2cList))+" i2c devices connected!")
-        print(i2cList)
+        except IOError:
+            pass
+    print("Found a total of "+str(len(i2cList))+" i2c devices connected!")
+    print([hex(i) for i in i2cList])
+    return i2cList
         
 if __name__ == '__main__':
     probeAll();